@@ -1,15 +1,16 @@
 from __future__ import annotations
+import math
 import numpy as np
 import warnings
 from abstract_game import TwoPlayerGame
-from dataclasses import dataclass, field
 from typing import List, Any, Optional
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from graphviz import Digraph
 
 def ascii_tictactoe_board(state):
     """
-        Given a 3x3 state where:
+        Given a TicTacToe bitboard state, whose 3x3 board has:
         0 -> empty
         1 -> X
         2 -> O
@@ -18,9 +19,12 @@ def ascii_tictactoe_board(state):
             . X .
             . O .
     """
+    # imported here so that searching other games does not load Tic-Tac-Toe
+    from tic_tac_toe import TicTacToe
+
     markers = {0: ".", 1: "X", 2: "O"}
     rows = []
-    for row in state:
+    for row in TicTacToe.to_board(state).reshape(3, 3).tolist():
         row_str = " ".join(markers[cell] for cell in row)
         rows.append(row_str)
     return "\n".join(rows)
@@ -51,125 +55,335 @@ def _build_label(node, node_id):
     )
     return label
 
-@dataclass(eq=False)
+# shared by all unexpanded nodes, which make up most of the tree; select_leaf
+# gives a node its own arrays when expanding it
+_NO_EDGES = np.zeros(0)
+_NO_EDGES.flags.writeable = False
+
 class MCTSNode:
-    state: Any
-    player_to_move: int
-    accumulated_value: float = 0.0
-    n_visits: int = 0
-    actions: List[int] = field(default_factory=list)
-    children_nodes: List[MCTSNode] = field(default_factory=list)
-    parent: Optional[MCTSNode] = None
-    terminal: bool = False
-    terminal_reward: int = 0.0
+    # plain class with __slots__ rather than @dataclass(slots=True), which needs Python 3.10+
+    __slots__ = (
+        'state', 'player_to_move', 'accumulated_value', 'n_visits', 'log_n_visits',
+        'actions', 'children_nodes', 'terminal', 'terminal_reward',
+        'child_visits', 'child_accum', 'child_virtual_loss', 'virtual_loss',
+    )
+
+    def __init__(self, state: Any, player_to_move: int,
+                 accumulated_value: float = 0.0, n_visits: int = 0,
+                 actions: Optional[List[int]] = None,
+                 children_nodes: Optional[List[MCTSNode]] = None,
+                 terminal: bool = False, terminal_reward: int = 0.0):
+        self.state = state
+        self.player_to_move = player_to_move
+        self.accumulated_value = accumulated_value
+        self.n_visits = n_visits
+        # log(n_visits), refreshed in backprop for the UCB exploration term
+        self.log_n_visits = math.log(n_visits) if n_visits > 0 else 0.0
+        self.actions = actions if actions is not None else []
+        self.children_nodes = children_nodes if children_nodes is not None else []
+        self.terminal = terminal
+        self.terminal_reward = terminal_reward
+        # per-child edge statistics (SoA): visits / accumulated value of children_nodes[i]
+        # gathered through this node; equal to the child's own without a transposition table
+        self.child_visits = _NO_EDGES
+        self.child_accum = _NO_EDGES
+        self.child_virtual_loss = _NO_EDGES
+        # number of in-flight (selected, not yet backpropagated) visits
+        self.virtual_loss = 0
 
 
 class TwoPlayerMCTS:
-    def __init__(self, game: TwoPlayerGame, exploration_coef: float = 1.0):
+    # value of a loss, added per pending visit during batched selection
+    VIRTUAL_LOSS = 1.0
+    # below this many children, UCB scores are computed with Python floats
+    VECTORIZE_MIN_CHILDREN = 16
+
+    def __init__(self, game: TwoPlayerGame, exploration_coef: float = 1.0,
+                 use_transposition_table: bool = False, seed: Optional[int] = None,
+                 n_workers: Optional[int] = None):
+        """
+        With use_transposition_table, nodes are shared between all move orders
+        leading to the same (player_to_move, state), turning the tree into a DAG.
+        A position already evaluated through one parent is not rolled out again
+        when another parent reaches it. This requires hashable states and a game without repeated positions.
+        seed initializes the random generator used for tie-breaking and rollouts.
+        With n_workers set, rollouts run in a pool of that many processes, which
+        is started on first use and kept until close().
+        """
         if exploration_coef < 0:
             raise ValueError("exploration_coef must be greater than 0")
         if np.isclose(exploration_coef, 0):
             warnings.warn('exploration_coef is set to 0')
         self.game = game
         self.exploration_coef = exploration_coef
+        self.use_transposition_table = use_transposition_table
+        self.tt = {}
+        self.rng = np.random.default_rng(seed)
+        self.n_workers = n_workers
+        self._executor = None
+
+    def close(self):
+        """
+        Shuts down the rollout worker pool, if one was started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def change_player_idx(self, player_idx):
         return 1 - player_idx
 
     def select_child_node_ucb(self, node):
-        if node.n_visits <= 0:
+        # guaranteed by run(), which only descends into visited or pending nodes;
+        # stripped under python -O
+        if __debug__ and node.n_visits + node.virtual_loss <= 0:
             raise AssertionError('Parent node n_visits must be > 0.')
-        action_scores = np.zeros(len(node.children_nodes), dtype=np.float32)
-        for child_idx, child in enumerate(node.children_nodes):
-            if child.n_visits != 0:
-                state_action_value = child.accumulated_value / child.n_visits
-                exploration_bonus = (
-                    self.exploration_coef
-                    * np.sqrt(np.log(node.n_visits) / child.n_visits)
-                )
-                action_scores[child_idx] = state_action_value - exploration_bonus
-            else:
+        if node.virtual_loss == 0:
+            log_n_visits = node.log_n_visits
+        else:
+            log_n_visits = math.log(node.n_visits + node.virtual_loss)
+        # pending (virtual) visits count as wins for the child, i.e. as losses
+        # for the player choosing it, steering the batch to other paths
+        if len(node.children_nodes) < self.VECTORIZE_MIN_CHILDREN:
+            best_indices = self._best_children_scalar(node, log_n_visits)
+        else:
+            best_indices = self._best_children_vectorized(node, log_n_visits)
+        if len(best_indices) == 1:
+            return best_indices[0]
+        return best_indices[self.rng.integers(len(best_indices))]
+
+    def _best_children_scalar(self, node, log_n_visits):
+        """
+        Returns the indices of the children with the lowest UCB score,
+        computed with Python floats, which beats NumPy for a few children.
+        """
+        action_scores = []
+        for visits, accum, virtual_loss in zip(
+            node.child_visits.tolist(), node.child_accum.tolist(), node.child_virtual_loss.tolist()
+        ):
+            visits += virtual_loss
+            if visits == 0:
                 # not visited yet => infinite priority for exploration
-                action_scores[child_idx] = -np.inf
+                action_scores.append(-math.inf)
+                continue
+            state_action_value = (accum + self.VIRTUAL_LOSS * virtual_loss) / visits
+            exploration_bonus = self.exploration_coef * math.sqrt(log_n_visits / visits)
+            action_scores.append(state_action_value - exploration_bonus)
 
-        best_indices = np.where(action_scores == action_scores.min())[0]
-        child_node_idx = np.random.choice(best_indices)
-        return child_node_idx
+        best_score = min(action_scores)
+        return [idx for idx, score in enumerate(action_scores) if score == best_score]
 
-    def run(self, state, player_idx_to_move, n_tree_iterations, n_rollout_simulations=10):
+    def _best_children_vectorized(self, node, log_n_visits):
+        """
+        Returns the indices of the children with the lowest UCB score,
+        computed with NumPy over the per-child arrays.
+        """
+        virtual_loss = node.child_virtual_loss
+        visits = node.child_visits + virtual_loss
+        safe_visits = np.maximum(visits, 1)
+        state_action_values = (
+            node.child_accum + self.VIRTUAL_LOSS * virtual_loss
+        ) / safe_visits
+        exploration_bonus = (
+            self.exploration_coef
+            * np.sqrt(log_n_visits / safe_visits)
+        )
+        # not visited yet => infinite priority for exploration
+        action_scores = np.where(
+            visits == 0, -np.inf, state_action_values - exploration_bonus
+        )
+        return np.flatnonzero(action_scores == action_scores.min())
+
+    def run(self, state, player_idx_to_move, n_tree_iterations, n_rollout_simulations=10,
+            batch_size=1):
+        """
+        Builds the search tree from the given state.
+
+        Each round selects up to batch_size leaves (virtual loss keeps them apart)
+        and expands them. All children of the expanded leaves are then rolled out
+        in one batched call and backpropagated. With n_workers set, the rollouts
+        of a round are split into one task per worker.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
         root = MCTSNode(state=state, player_to_move=player_idx_to_move)
-        for _ in range(n_tree_iterations):
-            # forward pass (select)
-            node = root
-            player_idx = player_idx_to_move
-            while len(node.children_nodes) != 0:
-                next_node_idx = self.select_child_node_ucb(node)
-                node = node.children_nodes[next_node_idx]
-                player_idx = self.change_player_idx(player_idx)
-
-            # expansion
-            if not node.terminal:
-                children_nodes = []
-                actions = []
-                possible_actions = self.game.get_possible_actions(player_idx, node.state)
-                for action_idx in possible_actions:
-                    new_state, reward, done = self.game.make_transition(
-                        player_idx, action_idx, node.state
-                    )
-                    children_nodes.append(MCTSNode(
-                        state=new_state,
-                        parent=node,
-                        terminal=done,
-                        terminal_reward=reward if done else 0.0,
-                        player_to_move=self.change_player_idx(player_idx)
-                    ))
-                    actions.append(action_idx)
-                node.children_nodes = children_nodes
-                node.actions = actions
-                node_to_rollout = np.random.choice(node.children_nodes)
-            else:
-                node_to_rollout = node
+        self.tt = {(player_idx_to_move, state): root} if self.use_transposition_table else {}
+        for round_start in range(0, n_tree_iterations, batch_size):
+            round_size = min(batch_size, n_tree_iterations - round_start)
+            leaves = [self.select_leaf(root) for _ in range(round_size)]
 
             # rollout
-            if not node_to_rollout.terminal:
-                rollout_reward = self.rollout(node_to_rollout, n_rollout_simulations)
-            else:
-                rollout_reward = node_to_rollout.terminal_reward
+            # children whose edge was seeded at expansion (transposition
+            # table hits) are not rolled out again
+            to_rollout = [
+                child
+                for leaf, _ in leaves
+                for child_idx, child in enumerate(leaf.children_nodes)
+                if not child.terminal and leaf.child_visits[child_idx] == 0
+            ]
+            rollout_rewards = iter(self._rollout_batch(
+                [child.player_to_move for child in to_rollout],
+                [child.state for child in to_rollout],
+                n_rollout_simulations
+            ))
 
             # backprop
-            node = node_to_rollout
-            while node is not None:
-                if node.player_to_move == 0:
-                    node.accumulated_value += rollout_reward
-                else:
-                    node.accumulated_value -= rollout_reward
-                node.n_visits += 1
-                node = node.parent
+            for leaf, path in leaves:
+                if leaf.terminal:
+                    self.backprop(path)
+                    continue
+                children_rewards = [
+                    None if leaf.child_visits[child_idx] != 0
+                    else child.terminal_reward if child.terminal
+                    else next(rollout_rewards)
+                    for child_idx, child in enumerate(leaf.children_nodes)
+                ]
+                self.backprop(path, children_rewards)
 
         return root
 
+    def _rollout_batch(self, player_idxs, states, n_rollout_simulations):
+        """
+        Rolls out all states of a round, in process or split into one task
+        per worker of the pool.
+        """
+        if self.n_workers is None or not states:
+            return self.game.rollout_batch(player_idxs, states, n_rollout_simulations, self.rng)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.n_workers)
+        n_tasks = min(self.n_workers, len(states))
+        bounds = [len(states) * i // n_tasks for i in range(n_tasks + 1)]
+        # each task gets a pickled copy, so give them independent streams
+        rngs = self.rng.spawn(n_tasks)
+        futures = [
+            self._executor.submit(
+                self.game.rollout_batch,
+                player_idxs[start:end], states[start:end], n_rollout_simulations, rng
+            )
+            for start, end, rng in zip(bounds, bounds[1:], rngs)
+        ]
+        return [reward for future in futures for reward in future.result()]
+
+    def select_leaf(self, root):
+        """
+        Descends from root by UCB, expands the reached leaf and returns it
+        with the path taken, as a list of (node, index in the previous node's
+        children) pairs. Adds a virtual loss along the path, removed in backprop.
+        """
+        # forward pass (select)
+        node = root
+        path = [(root, -1)]
+        player_idx = root.player_to_move
+        while len(node.children_nodes) != 0:
+            next_node_idx = self.select_child_node_ucb(node)
+            node = node.children_nodes[next_node_idx]
+            path.append((node, next_node_idx))
+            player_idx = self.change_player_idx(player_idx)
+
+        # expansion
+        if not node.terminal:
+            possible_actions = self.game.get_possible_actions(player_idx, node.state)
+            children_nodes = [None] * len(possible_actions)
+            next_player_idx = self.change_player_idx(player_idx)
+            for child_idx, action_idx in enumerate(possible_actions):
+                new_state, reward, done = self.game.make_transition(
+                    player_idx, action_idx, node.state
+                )
+                key = (next_player_idx, new_state)
+                child = self.tt.get(key) if self.use_transposition_table else None
+                if child is None:
+                    child = MCTSNode(
+                        state=new_state,
+                        terminal=done,
+                        terminal_reward=reward if done else 0.0,
+                        player_to_move=next_player_idx
+                    )
+                    if self.use_transposition_table:
+                        self.tt[key] = child
+                children_nodes[child_idx] = child
+            node.children_nodes = children_nodes
+            node.actions = list(possible_actions)
+            # edge statistics count only visits through this node, even for a
+            # child shared through the transposition table
+            node.child_visits = np.zeros(len(children_nodes))
+            node.child_accum = np.zeros(len(children_nodes))
+            node.child_virtual_loss = np.zeros(len(children_nodes))
+            for child_idx, child in enumerate(children_nodes):
+                if child.n_visits > 0:
+                    # already evaluated through another parent: reuse its mean
+                    # value as this edge's first visit instead of a rollout
+                    node.child_visits[child_idx] = 1
+                    node.child_accum[child_idx] = child.accumulated_value / child.n_visits
+
+        for i, (path_node, child_idx) in enumerate(path):
+            path_node.virtual_loss += 1
+            if i > 0:
+                path[i - 1][0].child_virtual_loss[child_idx] += 1
+        return node, path
+
+    def backprop(self, path, children_rewards=None):
+        """
+        Backpropagates the evaluation of the leaf at the end of path (as returned
+        by select_leaf) and removes the virtual loss added along it.
+
+        children_rewards holds the rollout rewards of an expanded leaf's children,
+        one visit each, and is None for a terminal leaf, which counts as a single
+        visit with its terminal reward. Only the nodes on path are updated, so
+        with a transposition table the other parents of a node keep their
+        own edge statistics. A None reward marks a child whose edge was seeded
+        from its mean value at expansion; it counts as a visit of the leaf, but
+        the shared child itself is left unchanged.
+        """
+        leaf = path[-1][0]
+        if children_rewards is None:
+            total_reward = leaf.terminal_reward
+            n_visits = 1
+        else:
+            total_reward = 0.0
+            child_accum = leaf.child_accum
+            child_visits = leaf.child_visits
+            for child_idx, (child, reward) in enumerate(zip(leaf.children_nodes, children_rewards)):
+                if reward is None:
+                    value = child_accum[child_idx]
+                    total_reward += value if child.player_to_move == 0 else -value
+                    continue
+                value = reward if child.player_to_move == 0 else -reward
+                child.accumulated_value += value
+                child.n_visits += 1
+                child.log_n_visits = math.log(child.n_visits)
+                child_accum[child_idx] += value
+                child_visits[child_idx] += 1
+                total_reward += reward
+            n_visits = len(children_rewards)
+
+        parent = None
+        for node, child_idx in path:
+            value = total_reward if node.player_to_move == 0 else -total_reward
+            node.accumulated_value += value
+            node.n_visits += n_visits
+            node.log_n_visits = math.log(node.n_visits)
+            node.virtual_loss -= 1
+            if parent is not None:
+                parent.child_accum[child_idx] += value
+                parent.child_visits[child_idx] += n_visits
+                parent.child_virtual_loss[child_idx] -= 1
+            parent = node
+
     def rollout(self, node: MCTSNode, n_rollout_simulations: int):
-        total_reward = 0
-        for _ in range(n_rollout_simulations):
-            pid = node.player_to_move
-            game_finished = False
-            state = node.state
-            while not game_finished:
-                possible_actions = self.game.get_possible_actions(pid, state)
-                if not possible_actions:
-                    raise AssertionError("Rollout: got no possible action in non-terminal state")
-                random_action = np.random.choice(possible_actions)
-                state, reward, done = self.game.make_transition(pid, random_action, state)
-                pid = self.change_player_idx(pid)
-                game_finished = done
-            total_reward += reward
-        avg_reward = total_reward / n_rollout_simulations
-        return avg_reward
+        return self.game.rollout(node.player_to_move, node.state, n_rollout_simulations, self.rng)
 
     def get_best_action(self, state, player_idx,
                         n_tree_iterations=10, n_rollout_simulations=5,
-                        dump_tree_to_file=False):
-        root = self.run(state, player_idx, n_tree_iterations, n_rollout_simulations)
+                        dump_tree_to_file=False, batch_size=1):
+        root = self.run(state, player_idx, n_tree_iterations, n_rollout_simulations,
+                        batch_size=batch_size)
 
         if dump_tree_to_file:
             self.visualize_mcts_tree(root)
@@ -279,3 +493,4 @@ class TwoPlayerMCTS:
                     action_label = f"action={current_node.actions[i]}"
                 dot.edge(current_id, node2id[child_node], label=action_label)
         dot.render(filename, view=view, format="pdf")
+
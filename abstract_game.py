@@ -2,6 +2,9 @@ from abc import ABC, abstractmethod
 
 
 class TwoPlayerGame(ABC):
+    # number of random floats drawn at once by the generic rollout
+    ROLLOUT_RANDOM_BLOCK = 64
+
     @abstractmethod
     def get_initial_state(self):
         """
@@ -34,3 +37,55 @@ class TwoPlayerGame(ABC):
                 Tuple (next_state, reward, done) - the next state, reward, flag done telling you if the game is finished
         """
         pass
+
+    def rollout(self, player_idx, state, n_simulations, rng):
+        """
+            Plays n_simulations uniformly random games from the given non-terminal state.
+            Games can override this with a faster implementation.
+            Params:
+                player_idx - 0 or 1, the player to move in state
+                state - the position of the game to simulate from
+                n_simulations - number of simulated games
+                rng - np.random.Generator to draw the random moves from
+            Returns:
+                float - average final reward of the simulated games
+        """
+        # game lengths are unknown here, so random moves are drawn in blocks
+        random_values = []
+        next_value = 0
+        total_reward = 0
+        for _ in range(n_simulations):
+            pid = player_idx
+            game_finished = False
+            current_state = state
+            while not game_finished:
+                possible_actions = self.get_possible_actions(pid, current_state)
+                if __debug__ and not possible_actions:
+                    raise AssertionError("Rollout: got no possible action in non-terminal state")
+                if next_value == len(random_values):
+                    random_values = rng.random(self.ROLLOUT_RANDOM_BLOCK).tolist()
+                    next_value = 0
+                random_action = possible_actions[int(random_values[next_value] * len(possible_actions))]
+                next_value += 1
+                current_state, reward, done = self.make_transition(pid, random_action, current_state)
+                pid = 1 - pid
+                game_finished = done
+            total_reward += reward
+        return total_reward / n_simulations
+
+    def rollout_batch(self, player_idxs, states, n_simulations, rng):
+        """
+            Rolls out several states at once, see rollout.
+            Games can override this to evaluate the whole batch in a single call.
+            Params:
+                player_idxs - list of players to move, one per state
+                states - list of non-terminal states
+                n_simulations - number of simulated games per state
+                rng - np.random.Generator to draw the random moves from
+            Returns:
+                List[float] - average final reward for every state
+        """
+        return [
+            self.rollout(player_idx, state, n_simulations, rng)
+            for player_idx, state in zip(player_idxs, states)
+        ]
@@ -0,0 +1,250 @@
+"""
+Numba-compiled kernels for the MCTS hot loops.
+
+If numba is not installed, the kernels run as plain Python functions,
+so the results are the same, only slower.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+FULL_BOARD = 0x1FF
+MAX_PLY = 9  # a game never lasts longer than the number of cells
+
+
+@njit(cache=True)
+def _next_random(rng_state):
+    """
+        Advances the xorshift32 generator kept in rng_state[0] (a nonzero
+        value below 2 ** 32) and returns a float in (0, 1). Only int64
+        arithmetic is used, so the sequence is the same with or without numba
+        and no global generator is touched.
+    """
+    x = rng_state[0]
+    x ^= (x << 13) & 0xFFFFFFFF
+    x ^= x >> 17
+    x ^= (x << 5) & 0xFFFFFFFF
+    rng_state[0] = x
+    return x / 4294967296.0
+
+
+@njit(cache=True)
+def _popcount(x):
+    count = 0
+    while x:
+        x &= x - 1
+        count += 1
+    return count
+
+
+@njit(cache=True)
+def _nth_set_bit(x, n):
+    """Returns the n-th (0-based, from the lowest) set bit of x as a mask."""
+    for _ in range(n):
+        x &= x - 1
+    return x & -x
+
+
+@njit(cache=True)
+def rollout_bitboard(p0, p1, pid, random_values, win_table):
+    """
+        Plays uniformly random games of Tic Tac Toe from the given position,
+        one per row of random_values.
+        Params:
+            p0, p1 - 9-bit masks of the cells occupied by player 0 and player 1
+            pid - index of the player to move
+            random_values - (n_sims, MAX_PLY) array of floats in [0, 1), pre-drawn
+                so that ply k of game i picks the empty cell int(random_values[i, k] * n_empty)
+            win_table - np.bool_ array of size 512, True for 9-bit masks containing a winning line
+        Returns:
+            float - average reward (1 if player 0 wins, -1 if player 1 wins, 0 for a draw)
+    """
+    n_sims = random_values.shape[0]
+    total_reward = 0
+    for sim in range(n_sims):
+        b0 = p0
+        b1 = p1
+        player = pid
+        ply = 0
+        while True:
+            empty = ~(b0 | b1) & FULL_BOARD
+            n_empty = _popcount(empty)
+            if n_empty == 0:
+                raise AssertionError("Rollout: got no possible action in non-terminal state")
+            cell = _nth_set_bit(empty, int(random_values[sim, ply] * n_empty))
+            ply += 1
+            if player == 0:
+                b0 |= cell
+                if win_table[b0]:
+                    total_reward += 1
+                    break
+            else:
+                b1 |= cell
+                if win_table[b1]:
+                    total_reward -= 1
+                    break
+            if (b0 | b1) == FULL_BOARD:
+                break
+            player = 1 - player
+    return total_reward / n_sims
+
+
+@njit(cache=True)
+def rollout_batch_bitboard(p0, p1, pid, random_values, win_table):
+    """
+        Runs rollout_bitboard for every position of a batch in one call.
+        Params:
+            p0, p1 - int64 arrays of the 9-bit masks of player 0 and player 1
+            pid - int64 array of the players to move
+            random_values - (n_positions, n_sims, MAX_PLY) array of pre-drawn floats in [0, 1)
+            win_table - np.bool_ array of size 512, True for 9-bit masks containing a winning line
+        Returns:
+            np.ndarray - average reward for every position
+    """
+    rewards = np.empty(p0.shape[0], dtype=np.float64)
+    for i in range(p0.shape[0]):
+        rewards[i] = rollout_bitboard(p0[i], p1[i], pid[i], random_values[i], win_table)
+    return rewards
+
+
+@njit(cache=True)
+def search_bitboard(p0, p1, pid, n_iterations, n_sims, exploration_coef, win_table, seed):
+    """
+        Runs MCTS for Tic Tac Toe with all nodes stored in flat arrays indexed
+        by node id, so no Python objects are created during the search.
+        Like TwoPlayerMCTS.run, every iteration expands one leaf and rolls out
+        all of its children, one visit each.
+        Params:
+            p0, p1 - 9-bit masks of the cells occupied by player 0 and player 1
+            pid - index of the player to move
+            n_iterations - number of tree iterations
+            n_sims - number of rollouts per iteration
+            exploration_coef - UCB exploration coefficient
+            win_table - np.bool_ array of size 512, True for 9-bit masks containing a winning line
+            seed - integer in [1, 2 ** 32) seeding the search's own random generator
+        Returns:
+            Tuple (actions, visits, accumulated_values, root_visits) - statistics of the
+            root's children and the number of visits of the root
+    """
+    # every iteration expands at most one node with at most 9 children
+    capacity = 1 + 9 * n_iterations
+    board_p0 = np.empty(capacity, dtype=np.int64)
+    board_p1 = np.empty(capacity, dtype=np.int64)
+    player = np.empty(capacity, dtype=np.int64)
+    action = np.empty(capacity, dtype=np.int64)
+    parent_idx = np.empty(capacity, dtype=np.int64)
+    child_start = np.zeros(capacity, dtype=np.int64)
+    child_count = np.zeros(capacity, dtype=np.int64)
+    visits = np.zeros(capacity, dtype=np.int64)
+    accum = np.zeros(capacity, dtype=np.float64)
+    terminal = np.zeros(capacity, dtype=np.bool_)
+    terminal_reward = np.zeros(capacity, dtype=np.float64)
+
+    rng_state = np.full(1, seed, dtype=np.int64)
+    random_values = np.empty((n_sims, MAX_PLY), dtype=np.float64)
+
+    board_p0[0] = p0
+    board_p1[0] = p1
+    player[0] = pid
+    action[0] = -1
+    parent_idx[0] = -1
+    n_nodes = 1
+
+    for _ in range(n_iterations):
+        # forward pass (select)
+        node = 0
+        while child_count[node] != 0:
+            log_n_visits = np.log(visits[node])
+            best_child = -1
+            best_score = np.inf
+            n_ties = 0
+            for child in range(child_start[node], child_start[node] + child_count[node]):
+                if visits[child] == 0:
+                    # not visited yet => infinite priority for exploration
+                    score = -np.inf
+                else:
+                    score = (
+                        accum[child] / visits[child]
+                        - exploration_coef * np.sqrt(log_n_visits / visits[child])
+                    )
+                if score < best_score:
+                    best_child = child
+                    best_score = score
+                    n_ties = 1
+                elif score == best_score:
+                    # uniform choice among ties by reservoir sampling
+                    n_ties += 1
+                    if _next_random(rng_state) * n_ties < 1.0:
+                        best_child = child
+            node = best_child
+
+        # expansion
+        if not terminal[node]:
+            b0 = board_p0[node]
+            b1 = board_p1[node]
+            mover = player[node]
+            empty = ~(b0 | b1) & FULL_BOARD
+            child_start[node] = n_nodes
+            while empty:
+                cell = empty & -empty
+                empty ^= cell
+                child = n_nodes
+                n_nodes += 1
+                parent_idx[child] = node
+                action[child] = _popcount(cell - 1)
+                player[child] = 1 - mover
+                if mover == 0:
+                    board_p0[child] = b0 | cell
+                    board_p1[child] = b1
+                    won = win_table[b0 | cell]
+                else:
+                    board_p0[child] = b0
+                    board_p1[child] = b1 | cell
+                    won = win_table[b1 | cell]
+                if won:
+                    terminal[child] = True
+                    terminal_reward[child] = 1.0 if mover == 0 else -1.0
+                elif (board_p0[child] | board_p1[child]) == FULL_BOARD:
+                    terminal[child] = True
+            child_count[node] = n_nodes - child_start[node]
+
+            # rollout every child, one visit each
+            total_reward = 0.0
+            for child in range(child_start[node], n_nodes):
+                if terminal[child]:
+                    reward = terminal_reward[child]
+                else:
+                    for sim in range(n_sims):
+                        for ply in range(MAX_PLY):
+                            random_values[sim, ply] = _next_random(rng_state)
+                    reward = rollout_bitboard(
+                        board_p0[child], board_p1[child], player[child],
+                        random_values, win_table
+                    )
+                accum[child] = reward if player[child] == 0 else -reward
+                visits[child] = 1
+                total_reward += reward
+            n_evaluated = child_count[node]
+        else:
+            total_reward = terminal_reward[node]
+            n_evaluated = 1
+
+        # backprop
+        while node != -1:
+            if player[node] == 0:
+                accum[node] += total_reward
+            else:
+                accum[node] -= total_reward
+            visits[node] += n_evaluated
+            node = parent_idx[node]
+
+    start = child_start[0]
+    end = start + child_count[0]
+    return action[start:end].copy(), visits[start:end].copy(), accum[start:end].copy(), visits[0]
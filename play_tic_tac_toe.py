@@ -5,15 +5,16 @@ from tic_tac_toe import TicTacToe
 def print_board(state):
     """
     Prints the Tic Tac Toe board in the terminal.
-    state: 3x3 matrix with:
+    state: TicTacToe bitboard, whose 3x3 board has:
         0 -> empty
         1 -> X
         2 -> O
     """
     markers = {0: ".", 1: "X", 2: "O"}
+    board = TicTacToe.to_board(state)
     print("Current board:")
     for row in range(3):
-        row_str = " ".join(markers[state[row][col]] for col in range(3))
+        row_str = " ".join(markers[board[row * 3 + col]] for col in range(3))
         print("  " + row_str)
     print()
 
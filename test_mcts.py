@@ -0,0 +1,202 @@
+import unittest
+import numpy as np
+from abstract_game import TwoPlayerGame
+from MCTS import TwoPlayerMCTS
+from tic_tac_toe import TicTacToe
+from tic_tac_toe_mcts import TicTacToeMCTS
+
+
+class ListStateTicTacToe(TwoPlayerGame):
+    """Tic Tac Toe with the board as a plain list, i.e. with unhashable states."""
+
+    def __init__(self):
+        self.game = TicTacToe()
+
+    def get_initial_state(self):
+        return [0] * 9
+
+    def get_possible_actions(self, player_idx, state):
+        return [i for i, cell in enumerate(state) if cell == 0]
+
+    def make_transition(self, player_idx, action_idx, state):
+        new_state, reward, done = self.game.make_transition(
+            player_idx, action_idx, self.game.from_board(state)
+        )
+        return self.game.to_board(new_state).tolist(), reward, done
+
+
+class CountingTicTacToe(TicTacToe):
+    """Tic Tac Toe that records the positions it rolls out."""
+
+    def __init__(self):
+        super().__init__()
+        self.rolled_out = []
+
+    def rollout_batch(self, player_idxs, states, n_simulations, rng):
+        self.rolled_out.extend(zip(player_idxs, states))
+        return super().rollout_batch(player_idxs, states, n_simulations, rng)
+
+
+def iterate_nodes(root):
+    """Yields every node reachable from root once."""
+    seen = {root}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        for child in node.children_nodes:
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+
+
+class TestTwoPlayerMCTS(unittest.TestCase):
+    def setUp(self):
+        """Create a seeded searcher over Tic Tac Toe before each test."""
+        self.game = TicTacToe()
+        self.mcts = TwoPlayerMCTS(self.game, seed=0)
+
+    def test_batched_run_clears_virtual_loss(self):
+        """Test that no virtual loss is left in the tree after a batched search."""
+        root = self.mcts.run(self.game.get_initial_state(), 0, 200, 3, batch_size=8)
+        for node in iterate_nodes(root):
+            self.assertEqual(node.virtual_loss, 0, "Node virtual loss should be removed by backprop.")
+            self.assertFalse(node.child_virtual_loss.any(), "Edge virtual loss should be removed by backprop.")
+
+    def test_leaves_share_empty_edge_arrays(self):
+        """Test that unexpanded nodes do not allocate their own edge arrays."""
+        root = self.mcts.run(self.game.get_initial_state(), 0, 50, 3)
+        leaves = [node for node in iterate_nodes(root) if not node.children_nodes]
+        self.assertGreater(len(leaves), 1, "The search should leave some nodes unexpanded.")
+        for leaf in leaves:
+            self.assertIs(leaf.child_visits, leaves[0].child_visits, "Leaves should share one empty array.")
+            self.assertFalse(leaf.child_visits.flags.writeable, "The shared empty array should be read-only.")
+
+    def test_invalid_batch_size(self):
+        """Test that a batch size below 1 raises a ValueError."""
+        with self.assertRaises(ValueError):
+            self.mcts.run(self.game.get_initial_state(), 0, 10, 3, batch_size=0)
+
+    def test_worker_pool_run(self):
+        """Test that a search with rollout workers keeps its pool and leaves no virtual loss."""
+        with TwoPlayerMCTS(self.game, seed=0, n_workers=2) as mcts:
+            root = mcts.run(self.game.get_initial_state(), 0, 40, 3, batch_size=4)
+            executor = mcts._executor
+            mcts.run(self.game.get_initial_state(), 0, 8, 3, batch_size=4)
+            self.assertIs(mcts._executor, executor, "The pool should be reused across searches.")
+        self.assertIsNone(mcts._executor, "The pool should be shut down on exit.")
+        for node in iterate_nodes(root):
+            self.assertEqual(node.virtual_loss, 0, "Node virtual loss should be removed by backprop.")
+
+    def test_vectorized_ucb_matches_scalar(self):
+        """Test that the NumPy and the scalar UCB paths grow the same tree for the same seed."""
+        scalar_root = self.mcts.run(self.game.get_initial_state(), 0, 200, 3, batch_size=4)
+        vectorized_mcts = TwoPlayerMCTS(self.game, seed=0)
+        vectorized_mcts.VECTORIZE_MIN_CHILDREN = 0
+        vectorized_root = vectorized_mcts.run(self.game.get_initial_state(), 0, 200, 3, batch_size=4)
+        self.assertEqual(vectorized_root.n_visits, scalar_root.n_visits, "Root visits should match.")
+        self.assertTrue(np.array_equal(vectorized_root.child_visits, scalar_root.child_visits), "Root edge visits should match.")
+        self.assertTrue(np.allclose(vectorized_root.child_accum, scalar_root.child_accum), "Root edge values should match.")
+
+    def test_unhashable_states(self):
+        """Test that the default search works for games whose states are not hashable."""
+        game = ListStateTicTacToe()
+        action = TwoPlayerMCTS(game, seed=0).get_best_action(
+            game.get_initial_state(), 0, n_tree_iterations=30, n_rollout_simulations=2
+        )
+        self.assertIn(action, range(9), "A valid cell should be chosen.")
+
+    def test_transposition_table_shares_nodes(self):
+        """Test that move orders reaching the same position share one node."""
+        mcts = TwoPlayerMCTS(self.game, use_transposition_table=True, seed=0)
+        root = mcts.run(self.game.get_initial_state(), 0, 300, 3)
+        node_by_key = {}
+        n_parents = {}
+        for node in iterate_nodes(root):
+            for child in node.children_nodes:
+                key = (child.player_to_move, child.state)
+                self.assertIs(node_by_key.setdefault(key, child), child, "A position should map to a single node.")
+                n_parents[child] = n_parents.get(child, 0) + 1
+        self.assertGreater(max(n_parents.values()), 1, "Some node should be reached from several parents.")
+
+    def test_transposition_table_saves_rollouts(self):
+        """Test that transposed children already evaluated elsewhere are not rolled out again."""
+        rolled_out = []
+        for use_transposition_table in (False, True):
+            game = CountingTicTacToe()
+            TwoPlayerMCTS(game, use_transposition_table=use_transposition_table, seed=0).run(
+                game.get_initial_state(), 0, 1000, 3
+            )
+            rolled_out.append(game.rolled_out)
+        self.assertLess(len(rolled_out[1]), len(rolled_out[0]), "The transposition table should reduce the number of rollouts.")
+        self.assertEqual(len(rolled_out[1]), len(set(rolled_out[1])), "No position should be rolled out twice.")
+
+    def test_edge_statistics_match_children(self):
+        """Test that without a transposition table the edge statistics equal the children's."""
+        root = self.mcts.run(self.game.get_initial_state(), 0, 300, 3, batch_size=8)
+        for node in iterate_nodes(root):
+            for child_idx, child in enumerate(node.children_nodes):
+                self.assertEqual(node.child_visits[child_idx], child.n_visits, "Edge visits should equal child visits.")
+                self.assertTrue(np.isclose(node.child_accum[child_idx], child.accumulated_value), "Edge value should equal child value.")
+
+    def test_transposed_edge_statistics(self):
+        """Test that with a transposition table the edges only count visits through their parent."""
+        mcts = TwoPlayerMCTS(self.game, use_transposition_table=True, seed=0)
+        root = mcts.run(self.game.get_initial_state(), 0, 400, 3, batch_size=8)
+        self.assertEqual(root.child_visits.sum(), root.n_visits, "Every root visit should go through one edge.")
+        for node in iterate_nodes(root):
+            if node.children_nodes:
+                self.assertLessEqual(node.child_visits.sum(), node.n_visits, "Edges should not count more visits than their parent.")
+            for child_idx, child in enumerate(node.children_nodes):
+                self.assertLessEqual(node.child_visits[child_idx], child.n_visits, "An edge should not count more visits than its child.")
+
+
+class TestTicTacToeMCTS(unittest.TestCase):
+    def setUp(self):
+        """Create a Tic Tac Toe game before each test."""
+        self.game = TicTacToe()
+
+    def test_compiled_search_finds_win(self):
+        """Test that the compiled search completes a row when it can."""
+        state = self.game.from_board([
+            [1, 1, 0],
+            [2, 2, 0],
+            [0, 0, 0]
+        ])
+        action = TicTacToeMCTS(seed=0).get_best_action(state, 0, n_tree_iterations=300)
+        self.assertEqual(action, 2, "Player 0 should complete the first row.")
+
+    def test_compiled_search_blocks_loss(self):
+        """Test that the compiled search blocks the opponent's open row."""
+        state = self.game.from_board([
+            [1, 1, 0],
+            [2, 0, 0],
+            [0, 0, 0]
+        ])
+        action = TicTacToeMCTS(seed=0).get_best_action(state, 1, n_tree_iterations=300)
+        self.assertEqual(action, 2, "Player 1 should block the first row.")
+
+    def test_compiled_search_visit_count(self):
+        """Test that every evaluated child adds one visit to the root and to a root child."""
+        _, visits, _, root_visits = TicTacToeMCTS(seed=0).root_statistics(self.game.get_initial_state(), 0, 200, 3)
+        self.assertEqual(visits.sum(), root_visits, "Root children visits should sum to the root's visits.")
+        self.assertGreaterEqual(root_visits, 200, "Every iteration should evaluate at least one node.")
+
+    def test_compiled_search_seed(self):
+        """Test that searches with the same seed give the same statistics."""
+        first = TicTacToeMCTS(seed=7).root_statistics(self.game.get_initial_state(), 0, 200, 3)
+        second = TicTacToeMCTS(seed=7).root_statistics(self.game.get_initial_state(), 0, 200, 3)
+        for first_values, second_values in zip(first, second):
+            np.testing.assert_array_equal(first_values, second_values)
+
+    def test_compiled_search_keeps_global_rng(self):
+        """Test that the compiled search leaves NumPy's global random generator alone."""
+        np.random.seed(123)
+        expected = np.random.random()
+        np.random.seed(123)
+        TicTacToeMCTS(seed=0).get_best_action(self.game.get_initial_state(), 0, n_tree_iterations=50)
+        self.assertEqual(np.random.random(), expected, "The global generator should not be reseeded or advanced.")
+
+
+if __name__ == '__main__':
+    unittest.main()
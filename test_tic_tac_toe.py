@@ -1,4 +1,6 @@
 import unittest
+import numpy as np
+from abstract_game import TwoPlayerGame
 from tic_tac_toe import TicTacToe  # Adjust the import path as necessary
 
 
@@ -15,7 +17,7 @@ class TestTicTacToe(unittest.TestCase):
             [0, 0, 0],
             [0, 0, 0]
         ]
-        self.assertEqual(self.initial_state, expected_state, "Initial state should be a 3x3 grid of zeros.")
+        self.assertEqual(self.game.to_board(self.initial_state).reshape(3, 3).tolist(), expected_state, "Initial state should be a 3x3 grid of zeros.")
 
     def test_possible_actions_initial(self):
         """Test that all cells are available at the start of the game."""
@@ -34,7 +36,7 @@ class TestTicTacToe(unittest.TestCase):
             [0, 0, 0],
             [0, 0, 0]
         ]
-        self.assertEqual(new_state, expected_state, "The state should reflect the player's move.")
+        self.assertEqual(self.game.to_board(new_state).reshape(3, 3).tolist(), expected_state, "The state should reflect the player's move.")
         self.assertEqual(reward, 0, "No reward should be given for a non-winning move.")
         self.assertFalse(done, "The game should not be done after a single move.")
 
@@ -71,14 +73,16 @@ class TestTicTacToe(unittest.TestCase):
         player_idx = 0  # Player 0
         action_idx = 2  # Completing the first row
         
-        new_state, reward, done = self.game.make_transition(player_idx, action_idx, state)
+        new_state, reward, done = self.game.make_transition(
+            player_idx, action_idx, self.game.from_board(state)
+        )
         
         expected_state = [
             [1, 1, 1],
             [2, 2, 0],
             [0, 0, 0]
         ]
-        self.assertEqual(new_state, expected_state, "The first row should be filled with Player 0's markers.")
+        self.assertEqual(self.game.to_board(new_state).reshape(3, 3).tolist(), expected_state, "The first row should be filled with Player 0's markers.")
         self.assertEqual(reward, 1, "Player 0 should receive a reward for winning.")
         self.assertTrue(done, "The game should end after a victory.")
 
@@ -93,14 +97,16 @@ class TestTicTacToe(unittest.TestCase):
         player_idx = 0  # Player 0
         action_idx = 6  # Completing the first column
         
-        new_state, reward, done = self.game.make_transition(player_idx, action_idx, state)
+        new_state, reward, done = self.game.make_transition(
+            player_idx, action_idx, self.game.from_board(state)
+        )
         
         expected_state = [
             [1, 2, 0],
             [1, 2, 0],
             [1, 0, 0]
         ]
-        self.assertEqual(new_state, expected_state, "The first column should be filled with Player 0's markers.")
+        self.assertEqual(self.game.to_board(new_state).reshape(3, 3).tolist(), expected_state, "The first column should be filled with Player 0's markers.")
         self.assertEqual(reward, 1, "Player 0 should receive a reward for winning.")
         self.assertTrue(done, "The game should end after a victory.")
 
@@ -115,14 +121,16 @@ class TestTicTacToe(unittest.TestCase):
         player_idx = 0  # Player 0
         action_idx = 8  # Completing the main diagonal
         
-        new_state, reward, done = self.game.make_transition(player_idx, action_idx, state)
+        new_state, reward, done = self.game.make_transition(
+            player_idx, action_idx, self.game.from_board(state)
+        )
         
         expected_state = [
             [1, 2, 0],
             [0, 1, 0],
             [0, 0, 1]
         ]
-        self.assertEqual(new_state, expected_state, "The main diagonal should be filled with Player 0's markers.")
+        self.assertEqual(self.game.to_board(new_state).reshape(3, 3).tolist(), expected_state, "The main diagonal should be filled with Player 0's markers.")
         self.assertEqual(reward, 1, "Player 0 should receive a reward for winning.")
         self.assertTrue(done, "The game should end after a victory.")
 
@@ -137,14 +145,16 @@ class TestTicTacToe(unittest.TestCase):
         player_idx = 0  # Player 0
         action_idx = 6  # Completing the anti-diagonal
         
-        new_state, reward, done = self.game.make_transition(player_idx, action_idx, state)
+        new_state, reward, done = self.game.make_transition(
+            player_idx, action_idx, self.game.from_board(state)
+        )
         
         expected_state = [
             [0, 2, 1],
             [0, 1, 0],
             [1, 0, 0]
         ]
-        self.assertEqual(new_state, expected_state, "The anti-diagonal should be filled with Player 0's markers.")
+        self.assertEqual(self.game.to_board(new_state).reshape(3, 3).tolist(), expected_state, "The anti-diagonal should be filled with Player 0's markers.")
         self.assertEqual(reward, 1, "Player 0 should receive a reward for winning.")
         self.assertTrue(done, "The game should end after a victory.")
 
@@ -159,14 +169,16 @@ class TestTicTacToe(unittest.TestCase):
         player_idx = 0  # Player 0
         action_idx = 8  # Last empty cell
         
-        new_state, reward, done = self.game.make_transition(player_idx, action_idx, state)
+        new_state, reward, done = self.game.make_transition(
+            player_idx, action_idx, self.game.from_board(state)
+        )
         
         expected_state = [
             [1, 2, 1],
             [2, 2, 2],
             [2, 1, 1]
         ]
-        self.assertEqual(new_state, expected_state, "The board should be full after the last move.")
+        self.assertEqual(self.game.to_board(new_state).reshape(3, 3).tolist(), expected_state, "The board should be full after the last move.")
         self.assertEqual(reward, 0, "No player should receive a reward in a draw.")
         self.assertTrue(done, "The game should end in a draw.")
 
@@ -181,16 +193,94 @@ class TestTicTacToe(unittest.TestCase):
         player_idx = 1  # Player 1
         action_idx = 5  # Place at (1, 2)
         
-        new_state, reward, done = self.game.make_transition(player_idx, action_idx, state)
+        new_state, reward, done = self.game.make_transition(
+            player_idx, action_idx, self.game.from_board(state)
+        )
         
         expected_state = [
             [1, 2, 0],
             [0, 1, 2],
             [0, 0, 0]
         ]
-        self.assertEqual(new_state, expected_state, "The state should reflect Player 1's move.")
+        self.assertEqual(self.game.to_board(new_state).reshape(3, 3).tolist(), expected_state, "The state should reflect Player 1's move.")
         self.assertEqual(reward, 0, "No reward should be given for a non-winning move.")
         self.assertFalse(done, "The game should continue after a non-winning move.")
 
+    def test_board_round_trip(self):
+        """Test that converting a board to a bitboard and back preserves it."""
+        board = [
+            [1, 2, 0],
+            [0, 1, 2],
+            [2, 0, 1]
+        ]
+        state = self.game.from_board(board)
+        self.assertEqual(self.game.to_board(state).reshape(3, 3).tolist(), board, "Board should survive a round trip through the bitboard.")
+
+    def test_to_board_flat_uint8(self):
+        """Test that boards are flat uint8 arrays and accepted back in flat form."""
+        board = self.game.to_board(self.game.from_board([
+            [1, 2, 0],
+            [0, 0, 0],
+            [0, 0, 2]
+        ]))
+        self.assertEqual(board.dtype, np.uint8, "Board cells should be uint8.")
+        self.assertEqual(board.tolist(), [1, 2, 0, 0, 0, 0, 0, 0, 2], "Board should be flat, row by row.")
+        self.assertEqual(self.game.from_board(board), self.game.from_board(board.reshape(3, 3)), "Flat and 3x3 boards should convert alike.")
+
+    def test_possible_actions_partial_board(self):
+        """Test that occupied cells of both players are excluded from possible actions."""
+        state = self.game.from_board([
+            [1, 2, 0],
+            [0, 1, 2],
+            [0, 0, 0]
+        ])
+        actions = self.game.get_possible_actions(1, state)
+        self.assertEqual(actions, [2, 3, 6, 7, 8], "Only empty cells should be available.")
+
+    def test_rollout_forced_win(self):
+        """Test that a rollout with a single, winning move always returns Player 0's reward."""
+        state = self.game.from_board([
+            [1, 1, 0],
+            [2, 2, 1],
+            [2, 1, 2]
+        ])
+        self.assertEqual(self.game.rollout(0, state, 10, np.random.default_rng(0)), 1, "The only move wins for Player 0.")
+
+    def test_generic_rollout_forced_win(self):
+        """Test that the generic Python rollout agrees with the compiled one."""
+        state = self.game.from_board([
+            [1, 1, 0],
+            [2, 2, 1],
+            [2, 1, 2]
+        ])
+        reward = TwoPlayerGame.rollout(self.game, 0, state, 10, np.random.default_rng(0))
+        compiled_reward = self.game.rollout(0, state, 10, np.random.default_rng(0))
+        self.assertEqual(reward, compiled_reward, "Generic and compiled rollouts should agree.")
+        self.assertEqual(reward, 1, "The only move wins for Player 0.")
+
+    def test_rollout_forced_draw(self):
+        """Test that a rollout with a single, drawing move returns zero reward."""
+        state = self.game.from_board([
+            [1, 2, 1],
+            [2, 2, 1],
+            [1, 1, 0]
+        ])
+        self.assertEqual(self.game.rollout(1, state, 10, np.random.default_rng(0)), 0, "The only move ends in a draw.")
+
+    def test_rollout_batch(self):
+        """Test that a batched rollout returns one reward per state, in order."""
+        win_state = self.game.from_board([
+            [1, 1, 0],
+            [2, 2, 1],
+            [2, 1, 2]
+        ])
+        draw_state = self.game.from_board([
+            [1, 2, 1],
+            [2, 2, 1],
+            [1, 1, 0]
+        ])
+        rewards = self.game.rollout_batch([0, 1], [win_state, draw_state], 10, np.random.default_rng(0))
+        self.assertEqual(rewards, [1, 0], "Rewards should match the forced outcomes of each state.")
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,15 +1,39 @@
-import copy
+import functools
+import numpy as np
 from abstract_game import TwoPlayerGame
+from mcts_numba import MAX_PLY, rollout_bitboard, rollout_batch_bitboard
+
+
+# Bit masks of the 8 winning lines (3 rows, 3 columns, 2 diagonals).
+# Cell (row, col) corresponds to bit row * 3 + col.
+WIN_MASKS = (0o007, 0o070, 0o700, 0o111, 0o222, 0o444, 0o421, 0o124)
+BOARD_MASK = 0x1FF  # all 9 cells
+PLAYER_SHIFT = 9  # bits 0..8 hold player 0, bits 9..17 hold player 1
+# 9-bit mask -> whether it contains a winning line, so checking a victory
+# is a single index instead of up to 8 mask comparisons
+_IS_WINNING_MASK = tuple(
+    any((mask & line) == line for line in WIN_MASKS) for mask in range(BOARD_MASK + 1)
+)
+WINNING_MASK_TABLE = np.array(_IS_WINNING_MASK, dtype=np.bool_)
+_CELL_INDICES = np.arange(9)
+# empty-cell mask -> cell indices of its set bits, so listing the moves
+# costs a lookup and a copy instead of a scan over the board
+_ACTIONS_BY_EMPTY_MASK = tuple(
+    tuple(i for i in range(9) if (empty >> i) & 1) for empty in range(BOARD_MASK + 1)
+)
 
 
 class TicTacToe(TwoPlayerGame):
     """
     A Tic Tac Toe game implementation inheriting from TwoPlayerGame.
 
-    Players are represented by indices:
-    - Player 0: Represented by 1 on the board
-    - Player 1: Represented by 2 on the board
-    Empty cells are represented by 0.
+    The state is a bitboard packed into a single int:
+    - Bits 0..8: cells occupied by Player 0
+    - Bits 9..17: cells occupied by Player 1
+    Cell (row, col) corresponds to bit row * 3 + col.
+
+    Use `to_board` / `from_board` to convert to and from a flat board of 9 cells,
+    where Player 0 is 1, Player 1 is 2 and empty cells are 0.
     """
 
     def get_possible_actions(self, player_idx, state):
@@ -18,30 +42,22 @@ class TicTacToe(TwoPlayerGame):
 
         Args:
             player_idx (int): The index of the current player (0 or 1).
-            state (list of lists): The current game state.
+            state (int): The current game state.
 
         Returns:
             list of int: List of cell indices (0-8) that are empty.
         """
-        possible_actions = []
-        for row in range(3):
-            for col in range(3):
-                if state[row][col] == 0:
-                    possible_actions.append(row * 3 + col)
-        return possible_actions
+        empty = ~(state | (state >> PLAYER_SHIFT)) & BOARD_MASK
+        return list(_ACTIONS_BY_EMPTY_MASK[empty])
 
     def get_initial_state(self):
         """
         Initializes and returns the initial game state.
 
         Returns:
-            list of lists: A 3x3 grid initialized to 0.
+            int: An empty bitboard.
         """
-        return [
-            [0, 0, 0],
-            [0, 0, 0],
-            [0, 0, 0]
-        ]
+        return 0
 
     def make_transition(self, player_idx, action_idx, state):
         """
@@ -51,79 +67,152 @@ class TicTacToe(TwoPlayerGame):
         Args:
             player_idx (int): The index of the current player (0 or 1).
             action_idx (int): The cell index (0-8) where the player wants to place their marker.
-            state (list of lists): The current game state.
+            state (int): The current game state.
 
         Returns:
             tuple: (new_state, reward, done)
-                - new_state (list of lists): The updated game state after the action.
+                - new_state (int): The updated game state after the action.
                 - reward (int): 1 if Player 0 wins, -1 if Player 1 wins, 0 otherwise.
                 - done (bool): True if the game has ended, False otherwise.
 
         Raises:
             ValueError: If the chosen action is invalid (cell already occupied or out of bounds).
         """
-        row = action_idx // 3
-        col = action_idx % 3
-
         # Validate action
         if not (0 <= action_idx <= 8):
             raise ValueError(f"Invalid action index: {action_idx}. Must be between 0 and 8.")
-        if state[row][col] != 0:
+        cell = 1 << action_idx
+        if (state | (state >> PLAYER_SHIFT)) & cell:
+            row, col = divmod(action_idx, 3)
             raise ValueError(f"Invalid action: Cell ({row}, {col}) is already occupied.")
 
-        # Create a deep copy of the state to avoid mutating the original
-        new_state = copy.deepcopy(state)
-        new_state[row][col] = player_idx + 1  # Player 0 -> 1, Player 1 -> 2
+        # Ints are immutable, so placing the marker never touches the original state
+        new_state = state | (cell << (PLAYER_SHIFT * player_idx))
+        reward, done = self._terminal_status(new_state, player_idx)
+        return (new_state, reward, done)
 
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)  # more than the 5478 legal positions
+    def _terminal_status(state, player_idx):
+        """
+        Evaluates the position after player_idx has moved. The result is cached
+        per position, since rollouts and expansions revisit the same ones.
+
+        Args:
+            state (int): The game state after the move.
+            player_idx (int): The index of the player who made the move (0 or 1).
+
+        Returns:
+            tuple: (reward, done), see make_transition.
+        """
         # Check for victory
-        if self._check_victory(new_state, player_idx + 1):
+        if TicTacToe._check_victory((state >> (PLAYER_SHIFT * player_idx)) & BOARD_MASK):
             reward = 1 if player_idx == 0 else -1
-            return (new_state, reward, True)
+            return (reward, True)
 
         # Check for draw
-        if self._is_draw(new_state):
-            return (new_state, 0, True)  # 0 represents a draw
+        if TicTacToe._is_draw(state):
+            return (0, True)  # 0 represents a draw
 
         # Game continues
-        return (new_state, 0, False)
+        return (0, False)
 
-    def _check_victory(self, state, player_marker):
+    def rollout(self, player_idx, state, n_simulations, rng):
         """
-        Checks if the specified player has won the game.
+        Plays n_simulations random games from a non-terminal state using the
+        compiled bitboard kernel.
 
         Args:
-            state (list of lists): The current game state.
-            player_marker (int): The marker of the player (1 or 2).
+            player_idx (int): The index of the player to move (0 or 1).
+            state (int): The current game state.
+            n_simulations (int): Number of simulated games.
+            rng (np.random.Generator): Generator for the random moves, all drawn in one call.
 
         Returns:
-            bool: True if the player has won, False otherwise.
+            float: Average reward of the simulated games.
         """
-        # Check rows
-        for row in state:
-            if all(cell == player_marker for cell in row):
-                return True
+        return rollout_bitboard(
+            state & BOARD_MASK, state >> PLAYER_SHIFT, player_idx,
+            rng.random((n_simulations, MAX_PLY)), WINNING_MASK_TABLE
+        )
 
-        # Check columns
-        for col in range(3):
-            if all(state[row][col] == player_marker for row in range(3)):
-                return True
+    def rollout_batch(self, player_idxs, states, n_simulations, rng):
+        """
+        Rolls out a batch of non-terminal states in a single call of the
+        compiled bitboard kernel.
+
+        Args:
+            player_idxs (list of int): The player to move in each state.
+            states (list of int): The game states.
+            n_simulations (int): Number of simulated games per state.
+            rng (np.random.Generator): Generator for the random moves, all drawn in one call.
+
+        Returns:
+            list of float: Average reward for every state.
+        """
+        states = np.array(states, dtype=np.int64)
+        rewards = rollout_batch_bitboard(
+            states & BOARD_MASK, states >> PLAYER_SHIFT,
+            np.array(player_idxs, dtype=np.int64),
+            rng.random((len(states), n_simulations, MAX_PLY)), WINNING_MASK_TABLE
+        )
+        return rewards.tolist()
+
+    @staticmethod
+    def _check_victory(player_mask):
+        """
+        Checks if the cells occupied by a player contain a winning line.
 
-        # Check diagonals
-        if all(state[i][i] == player_marker for i in range(3)):
-            return True
-        if all(state[i][2 - i] == player_marker for i in range(3)):
-            return True
+        Args:
+            player_mask (int): 9-bit mask of the cells occupied by the player.
 
-        return False
+        Returns:
+            bool: True if the player has won, False otherwise.
+        """
+        return _IS_WINNING_MASK[player_mask]
 
-    def _is_draw(self, state):
+    @staticmethod
+    def _is_draw(state):
         """
-        Checks if the game has ended in a draw.
+        Checks if the board is full.
 
         Args:
-            state (list of lists): The current game state.
+            state (int): The current game state.
 
         Returns:
             bool: True if the game is a draw, False otherwise.
         """
-        return all(cell != 0 for row in state for cell in row)
+        return (state | (state >> PLAYER_SHIFT)) & BOARD_MASK == BOARD_MASK
+
+    @staticmethod
+    def to_board(state):
+        """
+        Converts a bitboard state to a flat board.
+
+        Args:
+            state (int): The game state.
+
+        Returns:
+            np.ndarray: Length-9 uint8 array, cell (row, col) at index row * 3 + col,
+                with 0 for empty cells, 1 for Player 0 and 2 for Player 1.
+        """
+        cells = _CELL_INDICES
+        player_0 = (state >> cells) & 1
+        player_1 = (state >> (cells + PLAYER_SHIFT)) & 1
+        return (player_0 + 2 * player_1).astype(np.uint8)
+
+    @staticmethod
+    def from_board(board):
+        """
+        Converts a board to a bitboard state.
+
+        Args:
+            board (array-like): Flat 9-cell or 3x3 board with 0 for empty cells,
+                1 for Player 0 and 2 for Player 1.
+
+        Returns:
+            int: The game state.
+        """
+        cells = np.asarray(board, dtype=np.uint8).ravel()
+        bits = 1 << _CELL_INDICES
+        return int(bits[cells == 1].sum()) | (int(bits[cells == 2].sum()) << PLAYER_SHIFT)
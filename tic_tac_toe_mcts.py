@@ -0,0 +1,44 @@
+from typing import Optional
+from MCTS import TwoPlayerMCTS
+from tic_tac_toe import TicTacToe, BOARD_MASK, PLAYER_SHIFT, WINNING_MASK_TABLE
+from mcts_numba import search_bitboard
+
+
+class TicTacToeMCTS(TwoPlayerMCTS):
+    """
+    TwoPlayerMCTS specialised to TicTacToe. get_best_action runs the whole
+    search in the compiled search_bitboard kernel on flat node arrays.
+    Dumping the tree, batched search and worker processes need MCTSNode
+    objects, so these requests go through the generic implementation.
+    """
+    def __init__(self, exploration_coef: float = 1.0, seed: Optional[int] = None,
+                 n_workers: Optional[int] = None):
+        super().__init__(TicTacToe(), exploration_coef, seed=seed, n_workers=n_workers)
+
+    def get_best_action(self, state, player_idx,
+                        n_tree_iterations=10, n_rollout_simulations=5,
+                        dump_tree_to_file=False, batch_size=1):
+        if dump_tree_to_file or batch_size != 1 or self.n_workers is not None:
+            return super().get_best_action(
+                state, player_idx, n_tree_iterations, n_rollout_simulations,
+                dump_tree_to_file=dump_tree_to_file, batch_size=batch_size
+            )
+
+        actions, visits, accumulated_values, _ = self.root_statistics(
+            state, player_idx, n_tree_iterations, n_rollout_simulations
+        )
+        # pick best child
+        scores = accumulated_values / visits
+        best_idx = scores.argmin()
+        return int(actions[best_idx])
+
+    def root_statistics(self, state, player_idx, n_tree_iterations, n_rollout_simulations):
+        """
+        Runs the compiled search and returns the root's children statistics
+        as arrays (actions, visits, accumulated_values) and the root's visits.
+        """
+        return search_bitboard(
+            state & BOARD_MASK, state >> PLAYER_SHIFT, player_idx,
+            n_tree_iterations, n_rollout_simulations, self.exploration_coef,
+            WINNING_MASK_TABLE, int(self.rng.integers(1, 2 ** 32))
+        )